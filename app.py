@@ -1,8 +1,14 @@
-from flask import Flask, render_template, request, send_file, jsonify, after_this_request
+from flask import Flask, request, send_file, send_from_directory, jsonify
+from flask_compress import Compress
+import hashlib
+import json
 import os
-import uuid
+import shutil
 import threading
+import uuid
 import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from werkzeug.utils import secure_filename
 from converter import convert_pdf_to_ppt
@@ -12,73 +18,200 @@ app = Flask(__name__)
 # Configuration
 UPLOAD_FOLDER = Path('temp_uploads')
 OUTPUT_FOLDER = Path('temp_outputs')
+JOBS_FOLDER = Path('temp_jobs')
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50 MB
 ALLOWED_EXTENSIONS = {'pdf'}
-CLEANUP_DELAY = 300  # 5 minutes in seconds
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MB read buffer for upload streaming
+CACHE_MAX_ENTRIES = 32  # converted PPTX files kept on disk, LRU-evicted
+
+# Let werkzeug reject oversize uploads while reading the request, before
+# anything is written to disk (a 413 is raised mid-stream)
+app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
+
+# Compress the cheap text responses (landing page, JSON). The PPTX
+# mimetype is deliberately absent: the file is already zip-compressed,
+# and recompressing it would burn CPU and defeat sendfile on the
+# download path.
+app.config['COMPRESS_MIMETYPES'] = [
+    'text/html',
+    'application/json',
+    'text/css',
+    'application/javascript',
+]
+Compress(app)
 
 # Create folders if they don't exist
 UPLOAD_FOLDER.mkdir(exist_ok=True)
 OUTPUT_FOLDER.mkdir(exist_ok=True)
+JOBS_FOLDER.mkdir(exist_ok=True)
+
+# Conversions run in worker processes so a long render neither blocks
+# the web workers nor grows their resident memory; each job's pages and
+# presentation live (and die) in the worker.
+convert_executor = ProcessPoolExecutor(max_workers=max(2, (os.cpu_count() or 2) // 2))
+
+# Job state lives in small JSON records under JOBS_FOLDER rather than a
+# per-process dict: under gunicorn with several web workers the /status
+# and /download polls land on whichever worker, not necessarily the one
+# that accepted the upload, and all of them see the same files.
+JOB_MAX_AGE = 3600  # seconds before a finished job record is forgotten
+
+def write_job(job_id, record):
+    """
+    Persist a job record, atomically so a concurrent reader in another
+    worker never sees a partial write.
+
+    Args:
+        job_id: Job identifier (a UUID string)
+        record: Dict with the job's digest, download_name, done, error
+    """
+    tmp_path = JOBS_FOLDER / f"{job_id}.tmp"
+    with open(tmp_path, 'w') as out:
+        json.dump(record, out)
+    tmp_path.replace(JOBS_FOLDER / f"{job_id}.json")
+
+def read_job(job_id):
+    """
+    Load a job record by id.
+
+    Args:
+        job_id: Job identifier as received from the client
+
+    Returns:
+        The record dict, or None if the id is unknown (or not even a
+        well-formed job id - the id is used as a filename, so anything
+        that is not a plain UUID is rejected here)
+    """
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return None
+    try:
+        with open(JOBS_FOLDER / f"{job_id}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
 def allowed_file(filename):
     """Check if file has allowed extension."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def schedule_file_deletion(file_paths, delay=CLEANUP_DELAY):
+# Converted output cache: SHA-256 of the uploaded PDF -> cached PPTX
+# path. Re-uploads of the same document skip the whole render pipeline.
+pptx_cache = OrderedDict()
+pptx_cache_lock = threading.Lock()
+
+def cache_get(digest):
     """
-    Schedule files for deletion after a delay.
-    
+    Look up a cached PPTX by PDF content hash.
+
     Args:
-        file_paths: List of file paths to delete
-        delay: Delay in seconds before deletion (default: 300 = 5 minutes)
+        digest: SHA-256 hex digest of the uploaded PDF
+
+    Returns:
+        Path to the cached PPTX, or None on miss
     """
-    def delete_files():
-        time.sleep(delay)
-        for file_path in file_paths:
+    with pptx_cache_lock:
+        path = pptx_cache.get(digest)
+        if path is None:
+            # The LRU index is per-process; another gunicorn worker may
+            # already have converted this PDF, so fall through to disk
+            path = OUTPUT_FOLDER / f"{digest}.pptx"
+            if not path.exists():
+                return None
+        elif not path.exists():
+            # Evicted on disk (e.g. by the periodic cleanup sweep)
+            del pptx_cache[digest]
+            return None
+        pptx_cache[digest] = path
+        pptx_cache.move_to_end(digest)
+        return path
+
+def cache_put(digest, path):
+    """
+    Record a converted PPTX in the cache, evicting the least recently
+    used entries beyond CACHE_MAX_ENTRIES.
+
+    Args:
+        digest: SHA-256 hex digest of the source PDF
+        path: Path to the converted PPTX on disk
+    """
+    with pptx_cache_lock:
+        pptx_cache[digest] = path
+        pptx_cache.move_to_end(digest)
+        while len(pptx_cache) > CACHE_MAX_ENTRIES:
+            _, evicted = pptx_cache.popitem(last=False)
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    print(f"Deleted file: {file_path}")
-            except Exception as e:
-                print(f"Error deleting file {file_path}: {e}")
-    
-    # Run deletion in background thread
-    thread = threading.Thread(target=delete_files, daemon=True)
-    thread.start()
+                evicted.unlink()
+                print(f"Evicted cached output: {evicted}")
+            except OSError as e:
+                print(f"Error evicting {evicted}: {e}")
 
 def cleanup_old_files(folder, max_age_seconds=3600):
     """
     Clean up old files in a folder (files older than max_age_seconds).
-    
+
     Args:
         folder: Folder path to clean
         max_age_seconds: Maximum age of files in seconds (default: 1 hour)
     """
     try:
         current_time = time.time()
-        for file_path in Path(folder).glob('*'):
-            if file_path.is_file():
-                file_age = current_time - file_path.stat().st_mtime
-                if file_age > max_age_seconds:
+
+        # The folder's mtime changes whenever an entry is added or
+        # removed, so a fresh mtime means the folder is busy. Stale
+        # files may still exist alongside new ones; the sweep is just
+        # deferred while there is activity, and they are reaped on a
+        # later pass once the folder has gone quiet.
+        if current_time - os.stat(folder).st_mtime <= max_age_seconds:
+            return
+
+        # scandir caches stat results on the DirEntry, so this is one
+        # syscall per entry instead of the two that glob+stat cost.
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                if current_time - entry.stat().st_mtime > max_age_seconds:
                     try:
-                        file_path.unlink()
-                        print(f"Cleaned up old file: {file_path}")
+                        os.unlink(entry.path)
+                        print(f"Cleaned up old file: {entry.path}")
                     except Exception as e:
-                        print(f"Error cleaning up {file_path}: {e}")
+                        print(f"Error cleaning up {entry.path}: {e}")
     except Exception as e:
         print(f"Error during cleanup: {e}")
 
+
+def _periodic_cleanup(interval_seconds=600):
+    """Run cleanup_old_files on the work folders forever, off the request path."""
+    while True:
+        time.sleep(interval_seconds)
+        cleanup_old_files(UPLOAD_FOLDER)
+        cleanup_old_files(OUTPUT_FOLDER)
+        # Job records are touched when the job finishes, so this drops
+        # them JOB_MAX_AGE after completion
+        cleanup_old_files(JOBS_FOLDER, JOB_MAX_AGE)
+
+
+# One persistent background thread instead of scanning synchronously on
+# every landing-page request.
+threading.Thread(target=_periodic_cleanup, daemon=True).start()
+
 def immediate_file_cleanup(file_paths):
     """
-    Immediately delete files after response is sent.
-    
+    Immediately delete files or directories.
+
     Args:
-        file_paths: List of file paths to delete
+        file_paths: List of paths to delete; directories are removed
+            recursively in one rmtree call rather than entry by entry
     """
     for file_path in file_paths:
         try:
-            if os.path.exists(file_path):
+            if os.path.isdir(file_path):
+                shutil.rmtree(file_path, ignore_errors=True)
+                print(f"Immediately deleted directory: {file_path}")
+            elif os.path.exists(file_path):
                 os.remove(file_path)
                 print(f"Immediately deleted: {file_path}")
         except Exception as e:
@@ -86,11 +219,12 @@ def immediate_file_cleanup(file_paths):
 
 @app.route('/')
 def index():
-    """Render the main page."""
-    # Clean up old files on page load
-    cleanup_old_files(UPLOAD_FOLDER)
-    cleanup_old_files(OUTPUT_FOLDER)
-    return render_template('index.html')
+    """Serve the main page as a plain static file (it has no Jinja
+    placeholders, so rendering it through the template engine only adds
+    overhead)."""
+    response = send_from_directory('static', 'index.html')
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    return response
 
 @app.route('/convert', methods=['POST'])
 def convert():
@@ -108,77 +242,139 @@ def convert():
     if not allowed_file(file.filename):
         return jsonify({'error': 'Invalid file type. Only PDF files are allowed'}), 400
     
-    # Generate unique filenames to prevent collisions
-    unique_id = str(uuid.uuid4())
     secure_name = secure_filename(file.filename)
-    file_path = UPLOAD_FOLDER / f"{unique_id}_{secure_name}"
-    output_filename = f"{unique_id}_converted.pptx"
-    output_path = OUTPUT_FOLDER / output_filename
-    
+    original_name = Path(secure_name).stem + '.pptx'
+
+    # Stream the upload to disk through SHA-256 in 1 MB chunks; the hash
+    # keys the output cache so duplicate uploads skip conversion.
+    hasher = hashlib.sha256()
+    part_path = UPLOAD_FOLDER / f"{uuid.uuid4()}.part"
+    file_path = part_path
+
     try:
-        # Save uploaded file
-        file.save(str(file_path))
-        
-        # Check file size after saving
-        if file_path.stat().st_size > MAX_FILE_SIZE:
-            file_path.unlink()  # Delete the file
-            return jsonify({'error': 'File too large. Maximum size is 50MB'}), 413
-        
-        # Convert PDF to PPT
-        try:
-            convert_pdf_to_ppt(str(file_path), str(output_path))
-        except Exception as e:
-            # Clean up on conversion error
-            if file_path.exists():
-                file_path.unlink()
-            return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
-        
-        # Verify output was created
-        if not output_path.exists():
-            if file_path.exists():
-                file_path.unlink()
-            return jsonify({'error': 'Conversion failed to produce output'}), 500
-        
-        # Register cleanup after response is sent (immediate cleanup)
-        @after_this_request
-        def cleanup_after_request(response):
-            """Delete files immediately after sending the response."""
-            try:
-                # Small delay to ensure file is fully sent
-                threading.Timer(2.0, immediate_file_cleanup, 
-                              args=([str(file_path), str(output_path)],)).start()
-            except Exception as e:
-                print(f"Error scheduling immediate cleanup: {e}")
-            return response
-        
-        # Also schedule delayed cleanup as fallback (in case immediate cleanup fails)
-        schedule_file_deletion([str(file_path), str(output_path)], delay=CLEANUP_DELAY)
-        
-        # Send file with original name (without UUID)
-        original_name = Path(secure_name).stem + '.pptx'
-        
-        return send_file(
-            str(output_path),
-            as_attachment=True,
-            download_name=original_name,
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-        )
-    
+        # Check the magic bytes on the first chunk: anything that is not
+        # a real PDF fails here instead of deep inside the renderer
+        first_chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+        if not first_chunk.startswith(b'%PDF-'):
+            return jsonify({'error': 'File is not a valid PDF'}), 400
+
+        with open(part_path, 'wb') as out:
+            chunk = first_chunk
+            while chunk:
+                hasher.update(chunk)
+                out.write(chunk)
+                chunk = file.stream.read(UPLOAD_CHUNK_SIZE)
+
+        digest = hasher.hexdigest()
+        job_id = str(uuid.uuid4())
+
+        # The upload keeps a per-job name: two identical PDFs in flight
+        # must not share a file that one job's cleanup can pull out from
+        # under the other. Only the finished output is shared by digest.
+        file_path = UPLOAD_FOLDER / f"{job_id}.pdf"
+        part_path.replace(file_path)
+        record = {
+            'digest': digest,
+            'download_name': original_name,
+            'done': False,
+            'error': None,
+        }
+
+        # A cached conversion of the same PDF bytes completes the job
+        # immediately; the client's next /status poll sees 'finished'
+        cached_path = cache_get(digest)
+        if cached_path is not None:
+            file_path.unlink()
+            record['done'] = True
+            write_job(job_id, record)
+            return jsonify({'job_id': job_id}), 202
+
+        # Convert into a per-job file, then rename into the shared
+        # digest-keyed cache slot on success: concurrent jobs for the
+        # same PDF never write the same file, and the rename is atomic
+        work_path = OUTPUT_FOLDER / f"{job_id}.pptx"
+        final_path = OUTPUT_FOLDER / f"{digest}.pptx"
+
+        # Convert PDF to PPT in a worker process; the request returns at
+        # once and the client polls /status/<job_id>
+        write_job(job_id, record)
+        future = convert_executor.submit(
+            convert_pdf_to_ppt, str(file_path), str(work_path))
+
+        def on_done(fut, job_id=job_id, record=record, digest=digest,
+                    pdf_path=file_path, work=work_path, final=final_path):
+            exc = fut.exception()
+            if exc is None:
+                work.replace(final)
+                cache_put(digest, final)
+            else:
+                record['error'] = str(exc)
+            record['done'] = True
+            write_job(job_id, record)
+            # The upload (and any partial output) has served its purpose
+            immediate_file_cleanup([str(pdf_path), str(work)])
+
+        future.add_done_callback(on_done)
+        return jsonify({'job_id': job_id}), 202
+
     except Exception as e:
         # Clean up on any error
-        if file_path.exists():
-            try:
-                file_path.unlink()
-            except:
-                pass
-        if output_path.exists():
-            try:
-                output_path.unlink()
-            except:
-                pass
-        
+        for leftover in (part_path, file_path):
+            if leftover.exists():
+                try:
+                    leftover.unlink()
+                except:
+                    pass
+
         return jsonify({'error': f'Server error: {str(e)}'}), 500
 
+@app.route('/status/<job_id>')
+def status(job_id):
+    """Report the state of a conversion job."""
+    job = read_job(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    if not job['done']:
+        return jsonify({'status': 'processing'}), 200
+
+    if job['error'] is not None:
+        return jsonify({'status': 'failed', 'error': job['error']}), 200
+
+    return jsonify({'status': 'finished'}), 200
+
+@app.route('/download/<job_id>')
+def download(job_id):
+    """Send the converted PPTX for a finished job."""
+    job = read_job(job_id)
+
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+
+    if not job['done']:
+        return jsonify({'error': 'Conversion still in progress'}), 409
+    if job['error'] is not None:
+        return jsonify({'error': f"Conversion failed: {job['error']}"}), 500
+
+    output_path = OUTPUT_FOLDER / f"{job['digest']}.pptx"
+    if not output_path.exists():
+        return jsonify({'error': 'Output no longer available'}), 410
+
+    # Sending by path with conditional=True lets werkzeug advertise
+    # Accept-Ranges (resumable downloads) and answer If-None-Match
+    # repeats with an empty 304. The PPTX is already zip-compressed,
+    # so no response compression should wrap this.
+    return send_file(
+        str(output_path),
+        as_attachment=True,
+        download_name=job['download_name'],
+        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        conditional=True,
+        etag=True,
+        last_modified=output_path.stat().st_mtime
+    )
+
 @app.route('/health')
 def health():
     """Health check endpoint."""
@@ -195,8 +391,5 @@ def internal_server_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == "__main__":
-    # Set max content length (50 MB)
-    app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE
-    
     # Run with debug=False in production
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file